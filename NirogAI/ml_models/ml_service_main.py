@@ -3,13 +3,19 @@ NirogAI — FastAPI ML Service
 =============================
 File: ml_service/main.py
 
-Run:
-    uvicorn main:app --reload --host 0.0.0.0 --port 8000
+Run (development):
+    uvicorn ml_service_main:app --reload --host 0.0.0.0 --port 8000
+
+Run (production — one uvicorn worker per core, uvloop + httptools):
+    gunicorn ml_service_main:app -k uvicorn.workers.UvicornWorker -w $(nproc) \
+        --bind 0.0.0.0:8000 --worker-tmp-dir /dev/shm
+    (uvicorn picks up uvloop and httptools automatically when installed)
 
 Test:
     http://localhost:8000/docs   ← Swagger UI, test all endpoints here
 """
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -22,10 +28,14 @@ from routes.diabetes import router as diabetes_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 NirogAI ML Service starting...")
+    # Predict endpoints are plain `def` and run in AnyIO's threadpool;
+    # raise its default cap of 40 threads so screening bursts aren't queued
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
     try:
-        from routes.diabetes import load_bundle
-        load_bundle()
+        from routes.diabetes import load_bundle, warmup
+        bundle = load_bundle()
         print("✅ Diabetes model loaded")
+        print(f"✅ Diabetes warmup done in {warmup(bundle):.0f}ms")
     except Exception as e:
         print(f"⚠️  Diabetes model failed to load: {e}")
     yield
@@ -5,36 +5,181 @@ File: ml_service/routes/diabetes.py
 
 This file:
   1. Loads the trained diabetes_model_v6.pkl once at startup
-  2. Defines the /diabetes/predict endpoint
+  2. Defines the /diabetes/predict endpoint, and /diabetes/predict_batch for
+     up to MAX_BATCH_SIZE (2000) patients per call
   3. Validates input with Pydantic
   4. Returns structured JSON that Node.js backend will save to PostgreSQL
 """
 
 import joblib
-import json
-from functools import lru_cache
+import threading
+import time
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator
-from typing import Optional
-import pandas as pd
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+try:
+    from numba import njit
+except ImportError:   # numba is optional — the feature builder then runs as plain numpy
+    def njit(*args, **kwargs):
+        return lambda fn: fn
 
 router = APIRouter()
 
 MODEL_PATH = "saved_models/diabetes_model_v6.pkl"
 
+# Raw form fields, in the column order of the raw input matrix
+_RAW_FIELDS = (
+    'HighBP', 'HighChol', 'CholCheck', 'BMI', 'Smoker', 'Stroke', 'HeartDiseaseorAttack',
+    'PhysActivity', 'Fruits', 'Veggies', 'HvyAlcoholConsump', 'AnyHealthcare', 'NoDocbcCost',
+    'GenHlth', 'MentHlth', 'PhysHlth', 'DiffWalk', 'Sex', 'Age', 'Education', 'Income',
+)
+# Every feature the builder can produce: raw fields followed by engineered ones
+_ALL_FEATURES = _RAW_FIELDS + (
+    'CardioRisk', 'Lifestyle', 'HealthBurden', 'Is_Obese', 'Is_Overweight', 'BMI_Cat',
+    'Is_Senior', 'Age_x_BP', 'Age_x_Obese', 'Cardio_x_Lifestyle', 'BMI_x_Cardio',
+    'HealthAccess', 'GenHlth_x_Phys', 'Age_x_GenHlth',
+)
+_N_RAW = len(_RAW_FIELDS)
+_N_ALL = len(_ALL_FEATURES)
+_RAW_COL = {name: i for i, name in enumerate(_RAW_FIELDS)}
+
+# Row of each input / engineered feature in the builder's field-major matrix
+# (plain ints, since numba can't read a dict global)
+_F = {name: i for i, name in enumerate(_ALL_FEATURES)}
+_HIGHBP, _HIGHCHOL, _STROKE, _HDA = _F['HighBP'], _F['HighChol'], _F['Stroke'], _F['HeartDiseaseorAttack']
+_PHYSACT, _FRUITS, _VEGGIES, _ALCOHOL = _F['PhysActivity'], _F['Fruits'], _F['Veggies'], _F['HvyAlcoholConsump']
+_BMI, _MENT, _PHYS, _AGE, _GENHLTH = _F['BMI'], _F['MentHlth'], _F['PhysHlth'], _F['Age'], _F['GenHlth']
+_ANYHC, _NODOC = _F['AnyHealthcare'], _F['NoDocbcCost']
+_CARDIO, _LIFESTYLE, _BURDEN = _F['CardioRisk'], _F['Lifestyle'], _F['HealthBurden']
+_OBESE, _OVERWEIGHT, _BMI_CAT, _SENIOR = _F['Is_Obese'], _F['Is_Overweight'], _F['BMI_Cat'], _F['Is_Senior']
+_AGE_BP, _AGE_OBESE, _CARDIO_LIFE = _F['Age_x_BP'], _F['Age_x_Obese'], _F['Cardio_x_Lifestyle']
+_BMI_CARDIO, _ACCESS = _F['BMI_x_Cardio'], _F['HealthAccess']
+_GENHLTH_PHYS, _AGE_GENHLTH = _F['GenHlth_x_Phys'], _F['Age_x_GenHlth']
+
+# Key-factor rules, in display order: flag when lo <= raw[field] < hi
+_RULES = (
+    ('HighBP',               1,       np.inf, "High blood pressure"),
+    ('BMI',                  30,      np.inf, "Obesity (BMI {bmi:.1f})"),
+    ('BMI',                  25,      30,     "Overweight (BMI {bmi:.1f})"),
+    ('HighChol',             1,       np.inf, "High cholesterol"),
+    ('PhysActivity',         -np.inf, 1,      "Physical inactivity"),
+    ('Age',                  9,       np.inf, "Age 60+ years"),
+    ('HeartDiseaseorAttack', 1,       np.inf, "Heart disease history"),
+    ('Stroke',               1,       np.inf, "Prior stroke"),
+    ('HvyAlcoholConsump',    1,       np.inf, "Heavy alcohol use"),
+    ('GenHlth',              4,       np.inf, "Poor self-reported health"),
+)
+_RULE_ROWS   = np.array([_RAW_COL[field] for field, _, _, _ in _RULES])
+_RULE_LO     = np.array([lo for _, lo, _, _ in _RULES], dtype=np.float64)[:, None]
+_RULE_HI     = np.array([hi for _, _, hi, _ in _RULES], dtype=np.float64)[:, None]
+_RULE_LABELS = tuple(label for _, _, _, label in _RULES)
+
+# Indexed by np.searchsorted(bundle['_thresh_arr'], prob, side='right')
+_RISK_LEVELS = ('low', 'medium', 'high')
+_RECS = (
+    "Low risk. Stay active and screen annually after age 45.",
+    "Moderate risk. Schedule HbA1c and fasting glucose test.",
+    "High risk. Consult a doctor urgently for HbA1c and OGTT.",
+)
+
+
+# ── Load bundle once at startup ───────────────────────────────────────────────
+# The lifespan calls load_bundle(); routes then read _BUNDLE directly, so a
+# request pays no function call or lock. Reloading is just rebinding _BUNDLE.
+# _BUNDLE_ERROR keeps why the last load failed, for the 503s and /health.
+_BUNDLE: Optional[dict] = None
+_BUNDLE_ERROR: Optional[str] = None
+_BUNDLE_LOCK = threading.Lock()
+
 
-# ── Load bundle once and cache it ─────────────────────────────────────────────
-# lru_cache means the bundle is loaded only ONCE, not on every request
-@lru_cache(maxsize=1)
-def load_bundle():
+def load_bundle() -> dict:
+    global _BUNDLE, _BUNDLE_ERROR
+    with _BUNDLE_LOCK:
+        if _BUNDLE is None:
+            try:
+                _BUNDLE = _load_bundle_impl()
+            except Exception as e:
+                _BUNDLE_ERROR = str(e)
+                raise
+            _BUNDLE_ERROR = None
+    return _BUNDLE
+
+
+def _load_bundle_impl() -> dict:
     try:
+        # No mmap_mode: sklearn trees copy their nodes into their own buffers on
+        # unpickle, XGBoost/LightGBM rebuild boosters from bytes and the folded
+        # linear coef_ is replaced, so almost nothing would stay mapped anyway
         bundle = joblib.load(MODEL_PATH)
+        # Position of each model feature in the builder's _ALL_FEATURES rows
+        bundle['_feat_cols'] = np.array([_ALL_FEATURES.index(n) for n in bundle['feature_names']], dtype=np.int64)
+        # StandardScaler parameters stay float64 like StandardScaler.transform; only
+        # the scaled result is stored as float32
+        n_feats = len(bundle['feature_names'])
+        scaler  = bundle['scaler']
+        bundle['_scale_mean']  = np.ascontiguousarray(scaler.mean_ if scaler.with_mean else np.zeros(n_feats), dtype=np.float64)
+        bundle['_scale_scale'] = np.ascontiguousarray(scaler.scale_ if scaler.with_std else np.ones(n_feats), dtype=np.float64)
+        # Models saved with n_jobs=-1 would start a joblib Parallel dispatch on
+        # every predict_proba call — pure overhead for a handful of rows
+        for m in bundle['models'].values():
+            if hasattr(m, 'n_jobs'):
+                m.n_jobs = 1
+        # Ensemble weights as a vector in model order, pre-normalised to sum to 1
+        bundle['_model_order'] = list(bundle['models'].keys())
+        w_vec = np.array([bundle['ensemble_weights'][n] for n in bundle['_model_order']], dtype=np.float64)
+        bundle['_w_vec'] = w_vec / w_vec.sum()
+        # Risk-level cut points: prob < low_max -> low, < medium_max -> medium, else high
+        rt = bundle['risk_thresholds']
+        bundle['_thresh_arr'] = np.array([rt['low_max'], rt['medium_max']])
+        _fold_scaler(bundle)
+        _self_test(bundle)   # also compiles the numba builder before the first request
         print(f"Diabetes bundle loaded | Threshold: {bundle['thresh_screen']}")
         return bundle
     except FileNotFoundError:
         raise RuntimeError(f"Model not found at {MODEL_PATH}. Run diabetes_model_v6.py first.")
 
 
+# Every model was fit on (x - mean) / scale. Linear models can take raw
+# features instead with w' = w / scale, b' = b - (mean / scale) @ w.
+# Trees keep getting scaled features: a raw-space split threshold can't
+# reproduce how the scaled value rounds on a split midpoint.
+def _fold_scaler(bundle: dict) -> None:
+    mean, scale = bundle['_scale_mean'], bundle['_scale_scale']
+    folded = set()
+    for name, m in bundle['models'].items():
+        if isinstance(m, (LogisticRegression, SGDClassifier)):
+            coef = np.asarray(m.coef_, dtype=np.float64)
+            m.intercept_ = m.intercept_ - (mean / scale) @ coef.T
+            m.coef_      = (coef / scale).astype(np.float32)
+            folded.add(name)
+    bundle['_scaler_folded_models'] = folded
+    bundle['_needs_scaled'] = len(folded) < len(bundle['models'])
+
+
+# Startup check that the model inputs are already in the layout sklearn wants,
+# so predict_proba never makes a hidden converting copy
+def _self_test(bundle: dict) -> None:
+    for X in _build_features(bundle, _raw_matrix([_typical_patient()])):
+        if X is None:
+            continue
+        assert X.flags['C_CONTIGUOUS'] and X.dtype == np.float32, "diabetes feature matrix must be C-contiguous float32"
+
+
+# ── Warmup: one full prediction so the first real request isn't the cold one ──
+def warmup(bundle: dict) -> float:
+    """Run a throwaway prediction; returns how long it took in ms."""
+    start = time.perf_counter()
+    _predict_single(bundle, _typical_patient())
+    return (time.perf_counter() - start) * 1000
+
+
+def _typical_patient() -> dict:
+    return DiabetesInput(BMI=25.0, Age=7, GenHlth=3, PhysActivity=1).model_dump(exclude={'mode'})
+
+
 # ── Input schema (what the form sends) ────────────────────────────────────────
 # All fields the user fills in the React form
 # Optional fields default to 0 (so short form works too)
@@ -67,19 +212,21 @@ class DiabetesInput(BaseModel):
     # ── Mode ──────────────────────────────────────────────────────────────────
     mode: str = Field(default='screening', description="'screening' or 'balanced'")
 
-    @validator('mode')
+    @field_validator('mode')
+    @classmethod
     def mode_must_be_valid(cls, v):
         if v not in ('screening', 'balanced'):
             raise ValueError("mode must be 'screening' or 'balanced'")
         return v
 
-    class Config:
-        schema_extra = {
+    model_config = {
+        "json_schema_extra": {
             "example": {
                 "BMI": 28.5, "Age": 7, "GenHlth": 3, "PhysActivity": 0,
                 "HighBP": 1, "HighChol": 1, "Smoker": 0, "mode": "screening"
             }
         }
+    }
 
 
 # ── Output schema ─────────────────────────────────────────────────────────────
@@ -95,9 +242,19 @@ class DiabetesOutput(BaseModel):
     disclaimer:       str
 
 
+# ── Batch schemas ─────────────────────────────────────────────────────────────
+# Several patients in one call, so every model runs predict_proba once per batch.
+# Capped so one request can't hold a threadpool worker and large buffers for long
+MAX_BATCH_SIZE = 2000
+
+
+class DiabetesBatchInput(BaseModel):
+    patients: List[DiabetesInput] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 # ── PREDICT endpoint ──────────────────────────────────────────────────────────
 @router.post("/predict", response_model=DiabetesOutput)
-async def predict_diabetes(data: DiabetesInput):
+def predict_diabetes(data: DiabetesInput):
     """
     Predict diabetes risk from patient health data.
 
@@ -105,8 +262,10 @@ async def predict_diabetes(data: DiabetesInput):
     and recommendations. Node.js backend calls this and saves result to PostgreSQL.
     """
     try:
-        bundle = load_bundle()
-        patient_dict = data.dict(exclude={'mode'})
+        bundle = _BUNDLE
+        if bundle is None:
+            raise RuntimeError(_BUNDLE_ERROR or "Diabetes model is not loaded")
+        patient_dict = data.model_dump(exclude={'mode'})
 
         # Call the predict function from the model script
         result = _predict_single(bundle, patient_dict, mode=data.mode)
@@ -120,10 +279,35 @@ async def predict_diabetes(data: DiabetesInput):
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+@router.post("/predict_batch", response_model=List[DiabetesOutput])
+def predict_diabetes_batch(data: DiabetesBatchInput):
+    """
+    Predict diabetes risk for several patients at once.
+
+    Results are returned in the same order as the input patients.
+    """
+    try:
+        bundle   = _BUNDLE
+        if bundle is None:
+            raise RuntimeError(_BUNDLE_ERROR or "Diabetes model is not loaded")
+        patients = [p.model_dump(exclude={'mode'}) for p in data.patients]
+        modes    = [p.mode for p in data.patients]
+        return _predict_batch(bundle, patients, modes)
+
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
 @router.get("/health")
-async def diabetes_health():
+def diabetes_health():
+    bundle = _BUNDLE
+    if bundle is None:
+        return {"status": "unhealthy", "error": _BUNDLE_ERROR or "Diabetes model is not loaded"}
     try:
-        bundle = load_bundle()
         return {
             "status":    "healthy",
             "model":     "diabetes_model_v6",
@@ -136,75 +320,124 @@ async def diabetes_health():
 
 # ── predict_single (copied from diabetes_model_v6.py) ────────────────────────
 def _predict_single(bundle: dict, patient_data: dict, mode: str = 'screening') -> dict:
+    return _predict_batch(bundle, [patient_data], [mode])[0]
+
+
+# ── predict_batch ─────────────────────────────────────────────────────────────
+# One feature build and one predict_proba per model for the whole batch
+def _predict_batch(bundle: dict, patients: list, modes: list) -> list:
     models_b  = bundle['models']
-    weights_b = bundle['ensemble_weights']
-    scaler_b  = bundle['scaler']
-    feats     = bundle['feature_names']
-    thresh    = bundle['thresh_screen'] if mode == 'screening' else bundle['thresh_balanced']
-    rt        = bundle['risk_thresholds']
-
-    bmi = patient_data.get('BMI', 0)
-    if not (10 < bmi <= 80):
-        raise ValueError(f"BMI {bmi} must be between 10 and 80")
-
-    inp = pd.DataFrame([patient_data])
-    inp['BMI']                = inp['BMI'].clip(10, 80)
-    inp['MentHlth']           = inp['MentHlth'].clip(0, 30)
-    inp['PhysHlth']           = inp['PhysHlth'].clip(0, 30)
-    inp['CardioRisk']         = inp['HighBP'] + inp['HighChol'] + inp['HeartDiseaseorAttack'] + inp['Stroke']
-    inp['Lifestyle']          = inp['PhysActivity'] + inp['Fruits'] + inp['Veggies'] - inp['HvyAlcoholConsump']
-    inp['HealthBurden']       = inp['MentHlth'] + inp['PhysHlth']
-    inp['Is_Obese']           = (inp['BMI'] >= 30).astype(int)
-    inp['Is_Overweight']      = ((inp['BMI'] >= 25) & (inp['BMI'] < 30)).astype(int)
-    inp['BMI_Cat']            = pd.cut(inp['BMI'], bins=[0,18.5,25,30,40,100], labels=[0,1,2,3,4]).astype(int)
-    inp['Is_Senior']          = (inp['Age'] >= 9).astype(int)
-    inp['Age_x_BP']           = inp['Age'] * inp['HighBP']
-    inp['Age_x_Obese']        = inp['Age'] * inp['Is_Obese']
-    inp['Cardio_x_Lifestyle'] = inp['CardioRisk'] * (3 - inp['Lifestyle'].clip(0, 3))
-    inp['BMI_x_Cardio']       = inp['BMI'] * inp['CardioRisk']
-    inp['HealthAccess']       = inp['AnyHealthcare'] - inp['NoDocbcCost']
-    inp['GenHlth_x_Phys']     = inp['GenHlth'] * inp['PhysHlth']
-    inp['Age_x_GenHlth']      = inp['Age'] * inp['GenHlth']
-
-    inp        = inp[feats]
-    inp_scaled = scaler_b.transform(inp)
-
-    probas = {name: float(m.predict_proba(inp_scaled)[0][1]) for name, m in models_b.items()}
-    total_w = sum(weights_b[n] for n in probas)
-    prob    = sum(weights_b[n] * p for n, p in probas.items()) / total_w
-
-    if prob < rt['low_max']:      risk_level = 'low'
-    elif prob < rt['medium_max']: risk_level = 'medium'
-    else:                         risk_level = 'high'
-
-    key_factors = []
-    if patient_data.get('HighBP'):                key_factors.append("High blood pressure")
-    if patient_data.get('BMI', 0) >= 30:          key_factors.append(f"Obesity (BMI {bmi:.1f})")
-    elif patient_data.get('BMI', 0) >= 25:        key_factors.append(f"Overweight (BMI {bmi:.1f})")
-    if patient_data.get('HighChol'):              key_factors.append("High cholesterol")
-    if not patient_data.get('PhysActivity'):      key_factors.append("Physical inactivity")
-    if patient_data.get('Age', 1) >= 9:           key_factors.append("Age 60+ years")
-    if patient_data.get('HeartDiseaseorAttack'):  key_factors.append("Heart disease history")
-    if patient_data.get('Stroke'):                key_factors.append("Prior stroke")
-    if patient_data.get('HvyAlcoholConsump'):     key_factors.append("Heavy alcohol use")
-    if patient_data.get('GenHlth', 1) >= 4:       key_factors.append("Poor self-reported health")
-    if not key_factors:
-        key_factors.append("No major risk flags — maintain healthy lifestyle")
-
-    rec = {
-        'low':    "Low risk. Stay active and screen annually after age 45.",
-        'medium': "Moderate risk. Schedule HbA1c and fasting glucose test.",
-        'high':   "High risk. Consult a doctor urgently for HbA1c and OGTT."
-    }
+    order     = bundle['_model_order']
 
-    return {
-        'disease':          'diabetes',
-        'risk_probability': round(prob * 100, 1),
-        'risk_level':       risk_level,
-        'key_factors':      key_factors,
-        'recommendation':   rec[risk_level],
-        'threshold_used':   thresh,
-        'threshold_type':   mode,
-        'model_confidence': {n: round(p*100, 1) for n, p in probas.items()},
-        'disclaimer':       'Screening only. Does not replace medical diagnosis.'
-    }
+    for i, patient_data in enumerate(patients):
+        bmi = patient_data.get('BMI', 0)
+        if not (10 < bmi <= 80):
+            raise ValueError(f"BMI {bmi} must be between 10 and 80 (patient {i})")
+
+    raw             = _raw_matrix(patients)
+    X_raw, X_scaled = _build_features(bundle, raw)
+    folded          = bundle['_scaler_folded_models']
+
+    P = np.empty((len(patients), len(order)))
+    for k, name in enumerate(order):
+        X = X_raw if name in folded else X_scaled
+        P[:, k] = models_b[name].predict_proba(X)[:, 1]
+    probs = P @ bundle['_w_vec']
+
+    level_idx = np.searchsorted(bundle['_thresh_arr'], probs, side='right').tolist()
+
+    # Key-factor rules for the whole batch in one pass: (n_patients, n_rules)
+    vals  = raw[_RULE_ROWS]
+    flags = ((vals >= _RULE_LO) & (vals < _RULE_HI)).T
+
+    results = []
+    for i, patient_data in enumerate(patients):
+        prob       = float(probs[i])
+        mode       = modes[i]
+        bmi        = patient_data['BMI']
+        level      = level_idx[i]
+
+        key_factors = [_RULE_LABELS[r].format(bmi=bmi) for r in np.flatnonzero(flags[i])]
+        if not key_factors:
+            key_factors.append("No major risk flags — maintain healthy lifestyle")
+
+        results.append({
+            'disease':          'diabetes',
+            'risk_probability': round(prob * 100, 1),
+            'risk_level':       _RISK_LEVELS[level],
+            'key_factors':      key_factors,
+            'recommendation':   _RECS[level],
+            'threshold_used':   bundle['thresh_screen'] if mode == 'screening' else bundle['thresh_balanced'],
+            'threshold_type':   mode,
+            'model_confidence': {n: round(float(P[i, k]) * 100, 1) for k, n in enumerate(order)},
+            'disclaimer':       'Screening only. Does not replace medical diagnosis.'
+        })
+    return results
+
+
+# ── Feature engineering + scaling (no pandas) ───────────────────────────────
+# Same features as the training script. Raw fields are laid out field-major
+# (struct of arrays): a (len(_RAW_FIELDS), n_patients) matrix with one
+# contiguous row per field. Features and scaling are computed in float64,
+# like the pandas + StandardScaler pipeline they replace, and only the results
+# are stored as (n_patients, n_features) float32 arrays in
+# bundle['feature_names'] order: the raw features plus a standardised copy
+# (None when every model has the scaler folded in)
+def _raw_matrix(patients: list) -> np.ndarray:
+    n   = len(patients)
+    raw = np.empty((_N_RAW, n), dtype=np.float64)
+    for k, field in enumerate(_RAW_FIELDS):
+        raw[k] = np.fromiter((p[field] for p in patients), dtype=np.float64, count=n)
+    return raw
+
+
+def _build_features(bundle: dict, raw: np.ndarray) -> tuple:
+    do_scale   = bundle['_needs_scaled']
+    shape      = (raw.shape[1], len(bundle['_feat_cols']))
+    out_raw    = np.empty(shape, dtype=np.float32, order='C')
+    out_scaled = np.empty(shape if do_scale else (0, 0), dtype=np.float32, order='C')
+    _build_and_scale(raw, bundle['_feat_cols'], bundle['_scale_mean'], bundle['_scale_scale'],
+                     out_raw, out_scaled, do_scale)
+    return out_raw, (out_scaled if do_scale else None)
+
+
+# Whole-row array ops over the contiguous field rows; compiled by numba when
+# installed, plain numpy otherwise
+@njit(cache=True)
+def _build_and_scale(raw, cols, mean, scale, out_raw, out_scaled, do_scale):
+    v = np.empty((_N_ALL, raw.shape[1]))
+    v[:_N_RAW] = raw
+
+    bmi       = np.minimum(np.maximum(raw[_BMI], 10.0), 80.0)
+    ment      = np.minimum(np.maximum(raw[_MENT], 0.0), 30.0)
+    phys      = np.minimum(np.maximum(raw[_PHYS], 0.0), 30.0)
+    age       = raw[_AGE]
+    genhlth   = raw[_GENHLTH]
+    cardio    = raw[_HIGHBP] + raw[_HIGHCHOL] + raw[_HDA] + raw[_STROKE]
+    lifestyle = raw[_PHYSACT] + raw[_FRUITS] + raw[_VEGGIES] - raw[_ALCOHOL]
+    is_obese  = (bmi >= 30).astype(np.float64)
+
+    v[_BMI]          = bmi
+    v[_MENT]         = ment
+    v[_PHYS]         = phys
+    v[_CARDIO]       = cardio
+    v[_LIFESTYLE]    = lifestyle
+    v[_BURDEN]       = ment + phys
+    v[_OBESE]        = is_obese
+    v[_OVERWEIGHT]   = (bmi >= 25).astype(np.float64) - is_obese
+    v[_BMI_CAT]      = ((bmi > 18.5).astype(np.float64) + (bmi > 25).astype(np.float64)   # right-closed bins like
+                        + (bmi > 30).astype(np.float64) + (bmi > 40).astype(np.float64))  # pd.cut([0,18.5,25,30,40,100])
+    v[_SENIOR]       = (age >= 9).astype(np.float64)
+    v[_AGE_BP]       = age * raw[_HIGHBP]
+    v[_AGE_OBESE]    = age * is_obese
+    v[_CARDIO_LIFE]  = cardio * (3 - np.minimum(np.maximum(lifestyle, 0.0), 3.0))
+    v[_BMI_CARDIO]   = bmi * cardio
+    v[_ACCESS]       = raw[_ANYHC] - raw[_NODOC]
+    v[_GENHLTH_PHYS] = genhlth * phys
+    v[_AGE_GENHLTH]  = age * genhlth
+
+    for j in range(cols.shape[0]):
+        x = v[cols[j]]
+        out_raw[:, j] = x
+        if do_scale:
+            out_scaled[:, j] = (x - mean[j]) / scale[j]
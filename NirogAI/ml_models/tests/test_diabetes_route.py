@@ -0,0 +1,243 @@
+"""
+Diabetes route tests: the fast feature path must match the original
+pandas + StandardScaler pipeline from diabetes_model_v6.py.
+
+Run (from the ml_service folder):
+    python -m pytest -q tests
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+import routes.diabetes_route as dr
+
+FEATURES = list(dr._ALL_FEATURES[::-1])   # deliberately not in kernel order
+BINARY_FIELDS = ('HighBP', 'HighChol', 'CholCheck', 'Smoker', 'Stroke', 'HeartDiseaseorAttack',
+                 'PhysActivity', 'Fruits', 'Veggies', 'HvyAlcoholConsump', 'AnyHealthcare',
+                 'NoDocbcCost', 'DiffWalk', 'Sex')
+
+
+# ── Reference: the original feature pipeline (pandas) ─────────────────────────
+def reference_features(patients: list) -> pd.DataFrame:
+    inp = pd.DataFrame(patients)
+    inp['BMI']                = inp['BMI'].clip(10, 80)
+    inp['MentHlth']           = inp['MentHlth'].clip(0, 30)
+    inp['PhysHlth']           = inp['PhysHlth'].clip(0, 30)
+    inp['CardioRisk']         = inp['HighBP'] + inp['HighChol'] + inp['HeartDiseaseorAttack'] + inp['Stroke']
+    inp['Lifestyle']          = inp['PhysActivity'] + inp['Fruits'] + inp['Veggies'] - inp['HvyAlcoholConsump']
+    inp['HealthBurden']       = inp['MentHlth'] + inp['PhysHlth']
+    inp['Is_Obese']           = (inp['BMI'] >= 30).astype(int)
+    inp['Is_Overweight']      = ((inp['BMI'] >= 25) & (inp['BMI'] < 30)).astype(int)
+    inp['BMI_Cat']            = pd.cut(inp['BMI'], bins=[0,18.5,25,30,40,100], labels=[0,1,2,3,4]).astype(int)
+    inp['Is_Senior']          = (inp['Age'] >= 9).astype(int)
+    inp['Age_x_BP']           = inp['Age'] * inp['HighBP']
+    inp['Age_x_Obese']        = inp['Age'] * inp['Is_Obese']
+    inp['Cardio_x_Lifestyle'] = inp['CardioRisk'] * (3 - inp['Lifestyle'].clip(0, 3))
+    inp['BMI_x_Cardio']       = inp['BMI'] * inp['CardioRisk']
+    inp['HealthAccess']       = inp['AnyHealthcare'] - inp['NoDocbcCost']
+    inp['GenHlth_x_Phys']     = inp['GenHlth'] * inp['PhysHlth']
+    inp['Age_x_GenHlth']      = inp['Age'] * inp['GenHlth']
+    return inp[FEATURES]
+
+
+# ── Reference: the original risk level, key factors and recommendation ───────
+def reference_outcome(patient_data: dict, prob: float, rt: dict) -> tuple:
+    bmi = patient_data['BMI']
+    if prob < rt['low_max']:      risk_level = 'low'
+    elif prob < rt['medium_max']: risk_level = 'medium'
+    else:                         risk_level = 'high'
+
+    key_factors = []
+    if patient_data.get('HighBP'):                key_factors.append("High blood pressure")
+    if patient_data.get('BMI', 0) >= 30:          key_factors.append(f"Obesity (BMI {bmi:.1f})")
+    elif patient_data.get('BMI', 0) >= 25:        key_factors.append(f"Overweight (BMI {bmi:.1f})")
+    if patient_data.get('HighChol'):              key_factors.append("High cholesterol")
+    if not patient_data.get('PhysActivity'):      key_factors.append("Physical inactivity")
+    if patient_data.get('Age', 1) >= 9:           key_factors.append("Age 60+ years")
+    if patient_data.get('HeartDiseaseorAttack'):  key_factors.append("Heart disease history")
+    if patient_data.get('Stroke'):                key_factors.append("Prior stroke")
+    if patient_data.get('HvyAlcoholConsump'):     key_factors.append("Heavy alcohol use")
+    if patient_data.get('GenHlth', 1) >= 4:       key_factors.append("Poor self-reported health")
+    if not key_factors:
+        key_factors.append("No major risk flags — maintain healthy lifestyle")
+
+    rec = {
+        'low':    "Low risk. Stay active and screen annually after age 45.",
+        'medium': "Moderate risk. Schedule HbA1c and fasting glucose test.",
+        'high':   "High risk. Consult a doctor urgently for HbA1c and OGTT."
+    }
+    return risk_level, key_factors, rec[risk_level]
+
+
+def random_patients(rng, n: int, bmi_step: float) -> list:
+    patients = []
+    for _ in range(n):
+        p = {f: int(rng.integers(0, 2)) for f in BINARY_FIELDS}
+        p.update(
+            BMI=float(np.round(rng.uniform(15, 50) / bmi_step) * bmi_step),
+            Age=int(rng.integers(1, 14)), GenHlth=int(rng.integers(1, 6)),
+            MentHlth=int(rng.integers(0, 31)), PhysHlth=int(rng.integers(0, 31)),
+            Education=int(rng.integers(1, 7)), Income=int(rng.integers(1, 9)),
+        )
+        patients.append(p)
+    return patients
+
+
+# ── Fixtures: train a small bundle and load it through the service loader ────
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    rng   = np.random.default_rng(0)
+    train = random_patients(rng, 3000, bmi_step=1.0)   # integer BMI, like BRFSS
+    X     = reference_features(train)
+    y     = ((X['BMI'] >= 30) + X['CardioRisk'] + (X['Age'] >= 9) + rng.integers(0, 2, len(X)) >= 3).astype(int)
+
+    scaler   = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    models   = {
+        'lr': LogisticRegression(max_iter=1000).fit(X_scaled, y),
+        'rf': RandomForestClassifier(n_estimators=30, random_state=0, n_jobs=-1).fit(X_scaled, y),
+        'gb': GradientBoostingClassifier(n_estimators=30, random_state=0).fit(X_scaled, y),
+    }
+    weights = {'lr': 1.0, 'rf': 2.0, 'gb': 1.5}
+    rt      = {'low_max': 0.3, 'medium_max': 0.6}
+    path = tmp_path_factory.mktemp("models") / "diabetes_model_v6.pkl"
+    joblib.dump({
+        'models':           models,
+        'ensemble_weights': weights,
+        'scaler':           scaler,
+        'feature_names':    FEATURES,
+        'thresh_screen':    0.3,
+        'thresh_balanced':  0.5,
+        'risk_thresholds':  rt,
+        'metrics':          {},
+    }, path)
+    return {'path': path, 'scaler': scaler, 'models': models, 'weights': weights, 'risk_thresholds': rt}
+
+
+@pytest.fixture(scope="module")
+def bundle(trained):
+    mp = pytest.MonkeyPatch()
+    mp.setattr(dr, 'MODEL_PATH', str(trained['path']))
+    yield dr._load_bundle_impl()
+    mp.undo()
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_build_features_matches_reference(bundle, monkeypatch, compiled):
+    if compiled:
+        pytest.importorskip("numba")
+        assert hasattr(dr._build_and_scale, 'py_func')
+    elif hasattr(dr._build_and_scale, 'py_func'):
+        monkeypatch.setattr(dr, '_build_and_scale', dr._build_and_scale.py_func)
+
+    patients = random_patients(np.random.default_rng(1), 500, bmi_step=0.1)
+    X_raw, X_scaled = dr._build_features({**bundle, '_needs_scaled': True}, dr._raw_matrix(patients))
+    ref = reference_features(patients)
+
+    np.testing.assert_array_equal(X_raw, ref.to_numpy(dtype=np.float64).astype(np.float32))
+    np.testing.assert_array_equal(X_scaled, bundle['scaler'].transform(ref).astype(np.float32))
+
+
+@pytest.mark.parametrize("bmi_step", [0.5, 0.1])
+def test_scaled_features_match_standard_scaler(bundle, trained, bmi_step):
+    # x.5 BMIs sit on the split midpoints of trees trained on integer BMI, so
+    # any rounding difference in scaling would send them down another branch
+    patients = random_patients(np.random.default_rng(2), 2000, bmi_step=bmi_step)
+    _, X_scaled = dr._build_features({**bundle, '_needs_scaled': True}, dr._raw_matrix(patients))
+    expected    = trained['scaler'].transform(reference_features(patients))
+
+    np.testing.assert_array_equal(X_scaled, expected.astype(np.float32))
+    for name in ('rf', 'gb'):
+        m = trained['models'][name]
+        np.testing.assert_array_equal(m.predict_proba(X_scaled), m.predict_proba(expected))
+
+
+def test_predict_batch_matches_baseline(bundle, trained):
+    patients = random_patients(np.random.default_rng(3), 2000, bmi_step=0.5)
+    patients[0]['BMI'], patients[1]['BMI'] = 25.0, 30.0   # key-factor bin edges
+    results  = dr._predict_batch(bundle, patients, ['screening'] * len(patients))
+
+    X_scaled = trained['scaler'].transform(reference_features(patients))
+    probas   = {n: m.predict_proba(X_scaled)[:, 1] for n, m in trained['models'].items()}
+    total_w  = sum(trained['weights'].values())
+    prob     = sum(trained['weights'][n] * p for n, p in probas.items()) / total_w
+
+    assert bundle['_scaler_folded_models'] == {'lr'}
+    for i, r in enumerate(results):
+        for name in ('rf', 'gb'):
+            assert r['model_confidence'][name] == round(float(probas[name][i]) * 100, 1)
+        assert r['model_confidence']['lr'] == pytest.approx(float(probas['lr'][i]) * 100, abs=0.051)
+        assert r['risk_probability'] == pytest.approx(float(prob[i]) * 100, abs=0.051)
+        level, factors, rec = reference_outcome(patients[i], float(prob[i]), trained['risk_thresholds'])
+        assert (r['risk_level'], r['key_factors'], r['recommendation']) == (level, factors, rec)
+
+
+class FixedProba:
+    """Stand-in model whose positive-class probabilities are set exactly."""
+    def __init__(self, p):
+        self.p = np.asarray(p, dtype=np.float64)
+
+    def predict_proba(self, X):
+        assert len(X) == len(self.p)
+        return np.column_stack([1 - self.p, self.p])
+
+
+def test_risk_level_on_threshold_edges(bundle, trained):
+    rt    = trained['risk_thresholds']
+    probs = [0.0, np.nextafter(rt['low_max'], 0), rt['low_max'], np.nextafter(rt['medium_max'], 0),
+             rt['medium_max'], 1.0]
+    patients = random_patients(np.random.default_rng(4), len(probs), bmi_step=1.0)
+    for p, bmi in zip(patients, (24.9, 25.0, 29.9, 30.0, 18.5, 40.0)):
+        p['BMI'] = bmi
+    stub = {**bundle, 'models': {'stub': FixedProba(probs)}, '_model_order': ['stub'],
+            '_w_vec': np.array([1.0]), '_scaler_folded_models': set(), '_needs_scaled': True}
+
+    results = dr._predict_batch(stub, patients, ['screening'] * len(patients))
+    assert [r['risk_level'] for r in results] == ['low', 'low', 'medium', 'medium', 'high', 'high']
+    for p, prob, r in zip(patients, probs, results):
+        level, factors, rec = reference_outcome(p, float(prob), rt)
+        assert (r['risk_level'], r['key_factors'], r['recommendation']) == (level, factors, rec)
+
+
+def test_missing_model_reports_its_path(tmp_path, monkeypatch):
+    missing = tmp_path / "diabetes_model_v6.pkl"
+    monkeypatch.setattr(dr, 'MODEL_PATH', str(missing))
+    with pytest.raises(RuntimeError, match="diabetes_model_v6.pkl"):
+        dr._load_bundle_impl()
+
+
+
+def test_load_failure_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(dr, 'MODEL_PATH', str(tmp_path / "diabetes_model_v6.pkl"))
+    monkeypatch.setattr(dr, '_BUNDLE', None)
+    monkeypatch.setattr(dr, '_BUNDLE_ERROR', None)
+    with pytest.raises(RuntimeError):
+        dr.load_bundle()
+
+    assert "diabetes_model_v6.pkl" in dr.diabetes_health()['error']
+    with pytest.raises(HTTPException) as exc:
+        dr.predict_diabetes(dr.DiabetesInput(BMI=25.0, Age=7, GenHlth=3, PhysActivity=1))
+    assert exc.value.status_code == 503
+    assert "diabetes_model_v6.pkl" in exc.value.detail
+
+
+# ── Batch input ───────────────────────────────────────────────────────────────
+def test_batch_size_is_capped():
+    patient = {'BMI': 25.0, 'Age': 7, 'GenHlth': 3, 'PhysActivity': 1}
+    dr.DiabetesBatchInput(patients=[patient] * dr.MAX_BATCH_SIZE)
+    with pytest.raises(ValidationError):
+        dr.DiabetesBatchInput(patients=[patient] * (dr.MAX_BATCH_SIZE + 1))
+
+
+def test_bmi_error_names_the_patient(bundle):
+    patients = random_patients(np.random.default_rng(5), 3, bmi_step=1.0)
+    patients[2]['BMI'] = 10.0
+    with pytest.raises(ValueError, match=r"patient 2"):
+        dr._predict_batch(bundle, patients, ['screening'] * 3)